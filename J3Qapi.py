@@ -1,10 +1,37 @@
-from fastapi import FastAPI, Query, Depends, HTTPException, Security
-from fastapi.security.api_key import APIKeyHeader
+from fastapi import FastAPI, Query, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager, contextmanager
 from typing import Optional
 import sqlite3
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+from functools import lru_cache
 import os
+import asyncio
 import csv
+import json
+import queue
+import threading
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+import anyio
+import orjson
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson instead of the stdlib json module."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_CREATE_INDEXES and not DB_IMMUTABLE:
+        ensure_indexes()
+    open_pool()
+    load_schema()
+    yield
+    close_pool()
 
 app = FastAPI(
     title="J3Q Equities Prediction API",
@@ -17,26 +44,60 @@ Endpoints:
 - `/performance` → Retrieve performance metrics, optionally filtered by metric names.
 - `/trades` → Retrieve trade history for a symbol/horizon/date range.
 """,
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Tabular JSON compresses well; level 1 keeps the CPU cost low
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
 # Base directory where this script lives
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Allow override via environment variable, else default to local file in same folder
 DB_PATH = os.environ.get("SIM_DB_PATH", os.path.join(BASE_DIR, "simulation_results.db"))
 
+# Uvicorn worker processes; uvicorn reads the same variable as its --workers default
+WORKERS = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+# Long-lived SQLite connections per worker. The machine-wide budget is split
+# across workers unless SIM_DB_POOL_SIZE sets the per-worker size explicitly.
+POOL_SIZE = int(os.environ.get("SIM_DB_POOL_SIZE", "0")) or max(1, min(32, (os.cpu_count() or 1) * 4) // WORKERS)
+# Rows pulled from SQLite per fetchmany() call
+FETCH_BATCH_SIZE = 1000
+# Seconds a request waits for a free connection before answering 503
+DB_ACQUIRE_TIMEOUT = float(os.environ.get("SIM_DB_ACQUIRE_TIMEOUT", "10"))
+# Set SIM_DB_IMMUTABLE=1 when nothing writes the database while the API runs;
+# SQLite then skips file locking entirely
+DB_IMMUTABLE = os.environ.get("SIM_DB_IMMUTABLE") == "1"
+# Set SIM_DB_CREATE_INDEXES=1 to let startup add the INDEXES below. This writes
+# to the database file (indexes plus sqlite_stat1), so it is off by default.
+DB_CREATE_INDEXES = os.environ.get("SIM_DB_CREATE_INDEXES") == "1"
+
+# The API never writes, so every pooled connection is read-only and tuned for reads
+CONNECTION_PRAGMAS = [
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA query_only=1",
+]
+
 # Load allowed API keys from CSV and/or environment variable
 API_KEYS = set()
 API_KEY_FILE = os.path.join(BASE_DIR, "api_keys.csv")
 
+def load_api_keys_from_csv(path: str) -> set:
+    with open(path, newline="") as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, [])
+        if "api_key" not in header:
+            return set()
+        idx = header.index("api_key")
+        return {row[idx] for row in reader if len(row) > idx and row[idx]}
+
 # Option 1: Load from CSV if present
 if os.path.exists(API_KEY_FILE):
-    with open(API_KEY_FILE, newline="") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            if "api_key" in row:
-                API_KEYS.add(row["api_key"])
+    API_KEYS.update(load_api_keys_from_csv(API_KEY_FILE))
 else:
     print(f"⚠ Warning: API key file not found at {API_KEY_FILE}")
 
@@ -51,168 +112,474 @@ if env_keys:
 if not API_KEYS:
     print("⚠ Warning: No API keys loaded from CSV or environment variable.")
 
-API_KEY_NAME = "x-api-key"
-api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
+API_KEYS = frozenset(API_KEYS)
 
-def get_api_key(api_key_header: str = Security(api_key_header)):
-    if api_key_header in API_KEYS:
-        return api_key_header
-    raise HTTPException(status_code=401, detail="Unauthorized")
+API_KEY_HEADER = b"x-api-key"
+# Paths served without a key (interactive docs)
+PUBLIC_PATHS = frozenset({"/docs", "/docs/oauth2-redirect", "/redoc", "/openapi.json"})
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+class APIKeyMiddleware:
+    """Reject requests without a valid x-api-key header before routing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] not in PUBLIC_PATHS:
+            api_key = None
+            for name, value in scope["headers"]:
+                if name == API_KEY_HEADER:
+                    api_key = value.decode("latin-1")
+                    break
+            if api_key not in API_KEYS:
+                response = ORJSONResponse({"detail": "Unauthorized"}, status_code=401)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+app.add_middleware(APIKeyMiddleware)
+
+_default_openapi = app.openapi
+
+def openapi_with_api_key():
+    """Declare the x-api-key scheme so Swagger UI offers Authorize; enforcement is in APIKeyMiddleware."""
+    if app.openapi_schema is None:
+        schema = _default_openapi()
+        schema.setdefault("components", {})["securitySchemes"] = {
+            "APIKeyHeader": {"type": "apiKey", "in": "header", "name": API_KEY_HEADER.decode()}
+        }
+        schema["security"] = [{"APIKeyHeader": []}]
+    return app.openapi_schema
+
+app.openapi = openapi_with_api_key
+
+def connect_readonly(db_path: str) -> sqlite3.Connection:
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    if DB_IMMUTABLE:
+        uri += "&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
-def default_date_range(start_date: Optional[str], end_date: Optional[str]):
-    today = datetime.today().date()
-    if not end_date:
-        end_date = today.strftime("%Y-%m-%d")
-    if not start_date:
-        six_months_ago = today - timedelta(days=182)
-        start_date = six_months_ago.strftime("%Y-%m-%d")
-    return start_date, end_date
-
-def fetch_all_columns(table_name: str):
+# Thread-safe pool of reusable SQLite connections; once closed it closes returned connections instead of queueing them
+class ConnectionPool:
+    def __init__(self, db_path: str, size: int):
+        self._conns = queue.Queue(maxsize=size)
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._conns.put(connect_readonly(db_path))
+
+    def get(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """Take a connection; raises queue.Empty if none frees up within timeout."""
+        return self._conns.get(timeout=timeout)
+
+    def put(self, conn: sqlite3.Connection):
+        with self._lock:
+            if not self._closed:
+                self._conns.put_nowait(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            while not self._conns.empty():
+                self._conns.get_nowait().close()
+
+# Indexes backing the endpoint filters: (index name, table, columns)
+INDEXES = [
+    ("idx_equity_sym_hor_date", "equity", ["symbol", "horizon", "date"]),
+    ("idx_trades_sym_hor_tdate", "trades", ["symbol", "horizon", "trade_date"]),
+    ("idx_perf_sym_hor_metric", "performance", ["symbol", "horizon", "metric"]),
+]
+
+def ensure_indexes():
+    """Create any missing INDEXES (idempotent) and refresh planner stats if one was added."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        existing = {
+            row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        }
+        created = False
+        for index_name, table, columns in INDEXES:
+            if index_name in existing:
+                continue
+            cols = {row[0] for row in conn.execute("SELECT name FROM pragma_table_info(?)", (table,))}
+            if not set(columns) <= cols:
+                continue
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({', '.join(columns)})")
+            created = True
+        if created:
+            conn.execute("ANALYZE")
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        print(f"⚠ Warning: Could not create indexes in {DB_PATH}: {e}")
+    finally:
+        conn.close()
+
+pool: Optional[ConnectionPool] = None
+# One slot per pooled connection; queries, open streams and schema reloads each
+# hold a slot, so a slot holder only waits for a connection during a pool swap
+db_limiter: Optional[anyio.CapacityLimiter] = None
+
+# (inode, mtime) of the database file the current pool and schema were loaded from
+loaded_db_state: Optional[tuple[int, int]] = None
+reload_lock = threading.Lock()
+
+def db_file_state() -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(DB_PATH)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+def open_pool():
+    """Open the connection pool; must be called from the event loop."""
+    global pool, db_limiter, loaded_db_state
+    if pool is None:
+        loaded_db_state = db_file_state()
+        pool = ConnectionPool(DB_PATH, POOL_SIZE)
+        db_limiter = anyio.CapacityLimiter(POOL_SIZE)
+
+def close_pool():
+    global pool
+    if pool is not None:
+        pool.close()
+        pool = None
+
+def reopen_pool():
+    """Swap in fresh connections, e.g. after the database file was replaced."""
+    global pool, loaded_db_state
+    loaded_db_state = db_file_state()
+    old_pool, pool = pool, ConnectionPool(DB_PATH, POOL_SIZE)
+    if old_pool is not None:
+        old_pool.close()
+
+def take_connection(conn_pool: ConnectionPool) -> sqlite3.Connection:
+    try:
+        return conn_pool.get(timeout=DB_ACQUIRE_TIMEOUT)
+    except queue.Empty:
+        raise HTTPException(status_code=503, detail="Database busy, try again later.")
+
+@contextmanager
+def get_connection():
+    # Return the connection to the pool it came from, even if /admin/reload-schema swapped pools meanwhile
+    conn_pool = pool
+    conn = take_connection(conn_pool)
+    try:
+        yield conn
+    finally:
+        conn_pool.put(conn)
+
+# Table name -> column names, discovered once at startup
+SCHEMA: dict[str, list[str]] = {}
+
+def load_schema():
+    global SCHEMA
     with get_connection() as conn:
-        cur = conn.execute(f"PRAGMA table_info({table_name})")
-        return [row["name"] for row in cur.fetchall()]
+        rows = conn.execute(
+            "SELECT m.name AS tbl, p.name AS col FROM sqlite_master m "
+            "JOIN pragma_table_info(m.name) p "
+            "WHERE m.type='table' AND m.name NOT LIKE 'sqlite_%' "
+            "ORDER BY m.name, p.cid"
+        ).fetchall()
+    schema = {
+        table_name: [col for _, col in group]
+        for table_name, group in groupby(rows, key=itemgetter(0))
+    }
+    SCHEMA = schema
+    build_sql_templates(schema)
+
+EQUITY_CURVE_COLS = ["date", "equity_model", "equity_bh"]
+
+# Precompiled SQL per endpoint. QUERY_PLANS holds, per endpoint, one specialized
+# query builder per combination of requested optional filters, indexed by bitmask
+# (1 = symbol, 2 = horizon, 4 = metrics)
+SQL_PREVIEW: dict[str, str] = {}
+QUERY_PLANS: dict[str, list] = {}
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def make_query_plan(sql: str, arg_indexes: list[int]):
+    """Return a builder mapping the endpoint's argument tuple to (sql, params) for one fixed SQL string."""
+    if not arg_indexes:
+        return lambda args: (sql, ())
+    if len(arg_indexes) == 1:
+        index = arg_indexes[0]
+        return lambda args: (sql, (args[index],))
+    getter = itemgetter(*arg_indexes)
+    return lambda args: (sql, getter(args))
+
+# One plan per filter combination; optional_filters are (clause, arg index, column exists) in bitmask order
+def build_query_plans(select_sql: str, optional_filters: list[tuple[str, int, bool]],
+                      fixed_filters: list[tuple[str, list[int]]], order_by: str = "") -> list:
+    plans = []
+    for mask in range(1 << len(optional_filters)):
+        filters, arg_indexes = [], []
+        for bit, (clause, arg_index, available) in enumerate(optional_filters):
+            if available and mask & (1 << bit):
+                filters.append(clause)
+                arg_indexes.append(arg_index)
+        for clause, clause_args in fixed_filters:
+            filters.append(clause)
+            arg_indexes.extend(clause_args)
+        where_clause = f" WHERE {' AND '.join(filters)}" if filters else ""
+        plans.append(make_query_plan(f"{select_sql}{where_clause}{order_by}", arg_indexes))
+    return plans
+
+def build_sql_templates(schema: dict[str, list[str]]):
+    global SQL_PREVIEW, QUERY_PLANS
+    SQL_PREVIEW = {t: f"SELECT * FROM {quote_ident(t)} LIMIT ?" for t in schema}
+    plans = {}
+
+    # /equity and /trades args: (symbol, horizon, start_date, end_date)
+    cols = schema.get("equity")
+    if cols:
+        symbol_horizon = [("symbol = ?", 0, "symbol" in cols), ("horizon = ?", 1, "horizon" in cols)]
+        date_filter = [("date >= ? AND date <= ?", [2, 3])] if "date" in cols else []
+        plans["equity"] = build_query_plans(
+            "SELECT * FROM equity", symbol_horizon, date_filter, f" ORDER BY {quote_ident(cols[0])}, rowid"
+        )
+        if all(c in cols for c in EQUITY_CURVE_COLS):
+            plans["equity_curve"] = build_query_plans(
+                f"SELECT {', '.join(EQUITY_CURVE_COLS)} FROM equity", symbol_horizon, date_filter, " ORDER BY date, rowid"
+            )
+        else:
+            plans["equity_curve"] = plans["equity"]
+
+    # /performance args: (symbol, horizon, metrics as a JSON array)
+    cols = schema.get("performance")
+    if cols:
+        plans["performance"] = build_query_plans(
+            "SELECT * FROM performance",
+            [
+                ("symbol = ?", 0, "symbol" in cols),
+                ("horizon = ?", 1, "horizon" in cols),
+                ("metric IN (SELECT value FROM json_each(?))", 2, "metric" in cols),
+            ],
+            [],
+            " ORDER BY rowid"
+        )
 
-def table_exists(table_name: str) -> bool:
+    cols = schema.get("trades")
+    if cols:
+        symbol_horizon = [("symbol = ?", 0, "symbol" in cols), ("horizon = ?", 1, "horizon" in cols)]
+        date_filter = [("trade_date >= ? AND trade_date <= ?", [2, 3])] if "trade_date" in cols else []
+        plans["trades"] = build_query_plans(
+            "SELECT * FROM trades", symbol_horizon, date_filter, " ORDER BY trade_date, rowid"
+        )
+    QUERY_PLANS = plans
+
+def reload_db(only_if_changed: bool = False):
+    with reload_lock:
+        if only_if_changed and db_file_state() in (None, loaded_db_state):
+            return
+        reopen_pool()
+        load_schema()
+
+async def refresh_if_db_changed():
+    # Schema and pool are per worker process; each worker reloads its own as soon
+    # as it sees the database file replaced or modified
+    if db_file_state() not in (None, loaded_db_state):
+        await run_db(reload_db, True)
+
+@lru_cache(maxsize=1)
+def default_bounds(today_ordinal: int) -> tuple[str, str]:
+    """Default (start, end) dates for a given day; recomputed only when the day changes."""
+    today = date.fromordinal(today_ordinal)
+    six_months_ago = today - timedelta(days=182)
+    return six_months_ago.strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")
+
+def default_date_range(start_date: Optional[str], end_date: Optional[str]):
+    if start_date and end_date:
+        return start_date, end_date
+    default_start, default_end = default_bounds(date.today().toordinal())
+    return start_date or default_start, end_date or default_end
+
+def fetch_records(query: str, params=()):
+    records = []
     with get_connection() as conn:
-        res = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-            (table_name,)
-        ).fetchone()
-        return res is not None
-
-@app.get("/tables", dependencies=[Depends(get_api_key)], summary="List all tables and their columns")
-def list_tables():
+        cur = conn.execute(query, params)
+        keys = [d[0] for d in cur.description]
+        while chunk := cur.fetchmany(FETCH_BATCH_SIZE):
+            records.extend(dict(zip(keys, row)) for row in chunk)
+    return records
+
+def fetch_column_lists(query: str, params=()):
+    """Return rows column-oriented: {column: [values...]}."""
     with get_connection() as conn:
-        tables = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"
-        ).fetchall()
-    schema = {}
-    for t in tables:
-        table_name = t["name"]
-        schema[table_name] = fetch_all_columns(table_name)
-    return schema
-
-@app.get("/preview", dependencies=[Depends(get_api_key)], summary="Preview rows from a table")
-def preview_table(
+        cur = conn.execute(query, params)
+        names = [d[0] for d in cur.description]
+        columns = [[] for _ in names]
+        appends = [col.append for col in columns]
+        while chunk := cur.fetchmany(FETCH_BATCH_SIZE):
+            for row in chunk:
+                for append, value in zip(appends, row):
+                    append(value)
+    return dict(zip(names, columns))
+
+async def acquire_db_slot():
+    try:
+        with anyio.fail_after(DB_ACQUIRE_TIMEOUT):
+            await db_limiter.acquire()
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Database busy, try again later.")
+
+async def run_db(func, *args):
+    await acquire_db_slot()
+    try:
+        return await anyio.to_thread.run_sync(func, *args)
+    finally:
+        db_limiter.release()
+
+def encode_batch(cur, keys: list[str]) -> Optional[bytes]:
+    """Next FETCH_BATCH_SIZE rows as comma-joined JSON objects, or None when exhausted."""
+    chunk = cur.fetchmany(FETCH_BATCH_SIZE)
+    if not chunk:
+        return None
+    return b",".join(orjson.dumps(dict(zip(keys, row))) for row in chunk)
+
+# Streams a query's rows as a JSON array, holding a DB slot and connection until the download ends
+class RecordStreamResponse(StreamingResponse):
+    def __init__(self, query: str, params=()):
+        super().__init__(iter(()), media_type="application/json")
+        self.query = query
+        self.params = params
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await acquire_db_slot()
+        except HTTPException as e:
+            await ORJSONResponse({"detail": e.detail}, status_code=e.status_code)(scope, receive, send)
+            return
+        try:
+            conn_pool = pool
+            try:
+                # pool.get() blocks, so take the connection off the event loop
+                conn = await anyio.to_thread.run_sync(take_connection, conn_pool)
+            except HTTPException as e:
+                await ORJSONResponse({"detail": e.detail}, status_code=e.status_code)(scope, receive, send)
+                return
+            try:
+                cur = await anyio.to_thread.run_sync(conn.execute, self.query, self.params)
+                try:
+                    self.body_iterator = self.iter_json(cur)
+                    await super().__call__(scope, receive, send)
+                finally:
+                    # Finish the statement before the connection goes back to the pool
+                    cur.close()
+            finally:
+                conn_pool.put(conn)
+        finally:
+            db_limiter.release()
+
+    async def iter_json(self, cur):
+        keys = [d[0] for d in cur.description]
+        yield b"["
+        separator = b""
+        while (batch := await anyio.to_thread.run_sync(encode_batch, cur, keys)) is not None:
+            yield separator + batch
+            separator = b","
+        yield b"]"
+
+@app.get("/tables", response_model=None, summary="List all tables and their columns")
+async def list_tables():
+    await refresh_if_db_changed()
+    return ORJSONResponse(SCHEMA)
+
+@app.post("/admin/reload-schema", summary="Reload the cached database schema")
+async def reload_schema():
+    await run_db(reload_db)
+    return {"tables": sorted(SCHEMA)}
+
+@app.get("/preview", response_model=None, summary="Preview rows from a table")
+async def preview_table(
     table: str = Query(..., description="Name of the table to preview"),
     limit: int = Query(5, description="Number of rows to return")
 ):
-    if not table_exists(table):
-        return {"error": f"Table '{table}' not found in database."}
-    cols = fetch_all_columns(table)
-    if not cols:
-        return {"error": f"Table '{table}' has no columns."}
-    query = f"SELECT * FROM {table} LIMIT ?"
-    with get_connection() as conn:
-        rows = conn.execute(query, (limit,)).fetchall()
-    return [dict(r) for r in rows]
+    await refresh_if_db_changed()
+    query = SQL_PREVIEW.get(table)
+    if query is None:
+        raise HTTPException(status_code=404, detail=f"Table '{table}' not found in database.")
+    return ORJSONResponse(await run_db(fetch_records, query, (limit,)))
 
-@app.get("/equity", dependencies=[Depends(get_api_key)], summary="Retrieve equity curve data")
-def get_equity(
+@app.get("/equity", response_model=None, summary="Retrieve equity curve data")
+async def get_equity(
     symbol: Optional[str] = Query(None, description="Symbol to filter by"),
     horizon: Optional[str] = Query(None, description="Horizon to filter by"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    curve_only: bool = Query(False, description="If true, return only date, equity_model, equity_bh columns")
+    curve_only: bool = Query(False, description="If true, return only date, equity_model, equity_bh as column arrays")
 ):
-    if not table_exists("equity"):
+    await refresh_if_db_changed()
+    plans = QUERY_PLANS.get("equity_curve" if curve_only else "equity")
+    if plans is None:
         return {"error": "Table 'equity' not found in database."}
 
-    cols = fetch_all_columns("equity")
     start_date, end_date = default_date_range(start_date, end_date)
-    filters, params = [], []
-
-    if symbol and "symbol" in cols:
-        filters.append("symbol = ?")
-        params.append(symbol)
-    if horizon and "horizon" in cols:
-        filters.append("horizon = ?")
-        params.append(horizon)
-    if "date" in cols:
-        filters.append("date >= ? AND date <= ?")
-        params.extend([start_date, end_date])
-
-    where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
-    select_cols = ["date", "equity_model", "equity_bh"] if curve_only and all(c in cols for c in ["date", "equity_model", "equity_bh"]) else cols
-
-    query = f"SELECT {', '.join(select_cols)} FROM equity {where_clause} ORDER BY {select_cols[0]}"
-    with get_connection() as conn:
-        rows = conn.execute(query, params).fetchall()
-    return [dict(r) for r in rows]
+    mask = bool(symbol) | bool(horizon) << 1
+    query, params = plans[mask]((symbol, horizon, start_date, end_date))
+
+    if curve_only:
+        return ORJSONResponse(await run_db(fetch_column_lists, query, params))
+    if not mask:
+        # No symbol/horizon filter: potentially huge, so stream instead of materializing
+        return RecordStreamResponse(query, params)
+    return ORJSONResponse(await run_db(fetch_records, query, params))
 
-@app.get("/performance", dependencies=[Depends(get_api_key)], summary="Retrieve performance metrics")
-def get_performance(
+@app.get("/performance", response_model=None, summary="Retrieve performance metrics")
+async def get_performance(
     symbol: Optional[str] = Query(None, description="Symbol to filter by"),
     horizon: Optional[str] = Query(None, description="Horizon to filter by"),
     metrics: Optional[str] = Query(None, description="Comma-separated list of metrics to include")
 ):
-    if not table_exists("performance"):
+    await refresh_if_db_changed()
+    plans = QUERY_PLANS.get("performance")
+    if plans is None:
         return {"error": "Table 'performance' not found in database."}
 
-    cols = fetch_all_columns("performance")
-    filters, params = [], []
-
-    if symbol and "symbol" in cols:
-        filters.append("symbol = ?")
-        params.append(symbol)
-    if horizon and "horizon" in cols:
-        filters.append("horizon = ?")
-        params.append(horizon)
-    if metrics and "metric" in cols:
-        metric_list = [m.strip() for m in metrics.split(",") if m.strip()]
-        placeholders = ",".join("?" * len(metric_list))
-        filters.append(f"metric IN ({placeholders})")
-        params.extend(metric_list)
-
-    where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
-    query = f"SELECT * FROM performance {where_clause}"
-    with get_connection() as conn:
-        rows = conn.execute(query, params).fetchall()
-    return [dict(r) for r in rows]
+    metrics_json = json.dumps([m.strip() for m in metrics.split(",") if m.strip()]) if metrics else None
+    mask = bool(symbol) | bool(horizon) << 1 | bool(metrics) << 2
+    query, params = plans[mask]((symbol, horizon, metrics_json))
+    return ORJSONResponse(await run_db(fetch_records, query, params))
 
-@app.get("/trades", dependencies=[Depends(get_api_key)], summary="Retrieve trade history")
-def get_trades(
+@app.get("/trades", response_model=None, summary="Retrieve trade history")
+async def get_trades(
     symbol: Optional[str] = Query(None, description="Symbol to filter by"),
     horizon: Optional[str] = Query(None, description="Horizon to filter by"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
 ):
-    if not table_exists("trades"):
+    await refresh_if_db_changed()
+    plans = QUERY_PLANS.get("trades")
+    if plans is None:
         return {"error": "Table 'trades' not found in database."}
 
-    cols = fetch_all_columns("trades")
     start_date, end_date = default_date_range(start_date, end_date)
-    filters, params = [], []
-
-    if symbol and "symbol" in cols:
-        filters.append("symbol = ?")
-        params.append(symbol)
-    if horizon and "horizon" in cols:
-        filters.append("horizon = ?")
-        params.append(horizon)
-    if "trade_date" in cols:
-        filters.append("trade_date >= ? AND trade_date <= ?")
-        params.extend([start_date, end_date])
-
-    where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
-    query = f"SELECT * FROM trades {where_clause} ORDER BY trade_date"
-    with get_connection() as conn:
-        rows = conn.execute(query, params).fetchall()
-    return [dict(r) for r in rows]
+    mask = bool(symbol) | bool(horizon) << 1
+    query, params = plans[mask]((symbol, horizon, start_date, end_date))
+    if not mask:
+        # No symbol/horizon filter: potentially huge, so stream instead of materializing
+        return RecordStreamResponse(query, params)
+    return ORJSONResponse(await run_db(fetch_records, query, params))
 
 if __name__ == "__main__":
     print("🔍 Self-test: Inspecting database schema and sample data...")
-    schema = list_tables()
-    for table, columns in schema.items():
-        print(f"\n=== Table: {table} ===")
-        print(f"Columns: {columns}")
-        preview = preview_table(table, limit=3)
-        print(f"Sample rows ({len(preview)}):")
-        for row in preview:
-            print(row)
+
+    async def self_test():
+        open_pool()
+        load_schema()
+        schema = orjson.loads((await list_tables()).body)
+        for table, columns in schema.items():
+            print(f"\n=== Table: {table} ===")
+            print(f"Columns: {columns}")
+            preview = orjson.loads((await preview_table(table, limit=3)).body)
+            print(f"Sample rows ({len(preview)}):")
+            for row in preview:
+                print(row)
+        close_pool()
+
+    asyncio.run(self_test())
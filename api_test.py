@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import pandas as pd
 import sys
@@ -9,6 +10,11 @@ BASE_URL = "http://127.0.0.1:8000"
 API_KEY = "MY_SUPER_SECRET_KEY_123"
 HEADERS = {"x-api-key": API_KEY}
 
+# One keep-alive session for all calls so the TCP connection is reused
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 all_tests_passed = True  # Will flip to False if any test fails
 
 def test_endpoint(path, params=None, expect_nonempty=False):
@@ -16,7 +22,7 @@ def test_endpoint(path, params=None, expect_nonempty=False):
     global all_tests_passed
     print(f"=== {path} | params={params} ===")
     try:
-        r = requests.get(f"{BASE_URL}{path}", params=params or {}, headers=HEADERS)
+        r = SESSION.get(f"{BASE_URL}{path}", params=params or {})
     except Exception as e:
         print(f"❌ Request failed: {e}")
         all_tests_passed = False
@@ -54,28 +60,35 @@ tables = test_endpoint("/tables", expect_nonempty=True)
 if not tables or not isinstance(tables, dict):
     sys.exit(1)
 
-# 2️⃣ Helper to get (symbol, horizon) pairs from a table
+# 2️⃣ Helper to get distinct (symbol, horizon) pairs from a table
+PAIR_COLS = ["symbol", "horizon"]
+
 def get_pairs(table, symbol_col="symbol", horizon_col="horizon"):
     if table not in tables:
-        return set()
+        return pd.DataFrame(columns=PAIR_COLS)
     preview = test_endpoint("/preview", {"table": table, "limit": 1000})
-    return set(
-        (row.get(symbol_col), row.get(horizon_col))
-        for row in preview
-        if row.get(symbol_col) and row.get(horizon_col)
-    )
+    df = pd.DataFrame(preview if isinstance(preview, list) else [])
+    if symbol_col not in df or horizon_col not in df:
+        return pd.DataFrame(columns=PAIR_COLS)
+    pairs = df[[symbol_col, horizon_col]].replace("", pd.NA).dropna().drop_duplicates()
+    pairs.columns = PAIR_COLS
+    return pairs
 
 # 3️⃣ Find common (symbol, horizon) across all relevant tables
 pairs_trades = get_pairs("trades")
 pairs_equity = get_pairs("equity")
 pairs_perf = get_pairs("performance")
 
-common_pairs = pairs_trades & pairs_equity & pairs_perf
-if not common_pairs:
+common_pairs = (
+    pairs_trades
+    .merge(pairs_equity, how="inner", on=PAIR_COLS)
+    .merge(pairs_perf, how="inner", on=PAIR_COLS)
+)
+if common_pairs.empty:
     print("⚠ No common (symbol, horizon) found across all tables.")
     symbol_sample, horizon_sample = None, None
 else:
-    symbol_sample, horizon_sample = next(iter(common_pairs))
+    symbol_sample, horizon_sample = common_pairs.iloc[0]
     print(f"✅ Using sample pair: symbol={symbol_sample}, horizon={horizon_sample}")
 
 # 4️⃣ Pick a sample metric if available
@@ -7,13 +7,16 @@ REM ============================
 set API_DIR=C:\J3Q\API
 set API_FILE=J3Qapi:app
 set API_PORT=8000
+REM One uvicorn worker per CPU; J3Qapi.py also reads WEB_CONCURRENCY to split its
+REM connection pool across workers (override per worker with SIM_DB_POOL_SIZE)
+set WEB_CONCURRENCY=%NUMBER_OF_PROCESSORS%
 set TEST_SCRIPT=api_test.py
 
 REM ============================
 REM STEP 1: Kill any existing API server on this port
 REM ============================
 echo Killing any process using port %API_PORT%...
-FOR /F "tokens=5" %%P IN ('netstat -ano ^| findstr :%API_PORT% ^| findstr LISTENING') DO taskkill /F /PID %%P >nul 2>&1
+FOR /F "tokens=5" %%P IN ('netstat -ano ^| findstr :%API_PORT% ^| findstr LISTENING') DO taskkill /F /T /PID %%P >nul 2>&1
 
 REM ============================
 REM STEP 2: Change to API directory
@@ -23,13 +26,13 @@ cd /d %API_DIR%
 REM ============================
 REM STEP 3: Install dependencies (optional)
 REM ============================
-pip install fastapi uvicorn pandas requests >nul
+pip install fastapi "uvicorn[standard]" orjson pandas requests >nul
 
 REM ============================
 REM STEP 4: Start API server in background
 REM ============================
 echo Starting API server...
-start "" /B python -m uvicorn %API_FILE% --host 0.0.0.0 --port %API_PORT%
+start "" /B python -m uvicorn %API_FILE% --host 0.0.0.0 --port %API_PORT% --workers %WEB_CONCURRENCY%
 REM Give it a few seconds to start
 timeout /t 5 /nobreak >nul
 
@@ -44,7 +47,7 @@ REM ============================
 REM STEP 6: Shut down API server
 REM ============================
 echo Stopping API server...
-FOR /F "tokens=5" %%P IN ('netstat -ano ^| findstr :%API_PORT% ^| findstr LISTENING') DO taskkill /F /PID %%P >nul 2>&1
+FOR /F "tokens=5" %%P IN ('netstat -ano ^| findstr :%API_PORT% ^| findstr LISTENING') DO taskkill /F /T /PID %%P >nul 2>&1
 
 REM ============================
 REM STEP 7: Print summary